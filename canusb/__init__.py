@@ -0,0 +1,29 @@
+from canusb.protocol import CANUSB_INJECT_SLEEP_GAP_DEFAULT, CANUSB_TTY_BAUD_RATE_DEFAULT, CANUSB_RECORD, \
+    CANUSB_SPEED, CANUSB_MODE, CANUSB_FRAME, CANUSB_PAYLOAD_MODE, canusb_int_to_speed, canusb_speed_to_int, \
+    can_frame_bits, format_frame, pack_record
+from canusb.bus import Bus
+
+# Everything else is imported on first use so that importing the package (and
+# starting the CLI) does not pay for threads, compression or shared memory.
+# The NumPy-based analyzer is imported explicitly as canusb.analyze.
+_LAZY = {
+    'PayloadPool': 'canusb.payload',
+    'BusThrottle': 'canusb.throttle',
+    'FlightRecorder': 'canusb.capture',
+    'SegmentWriter': 'canusb.capture',
+    'ChangeFilter': 'canusb.capture',
+    'trigger_on_id': 'canusb.capture',
+    'trigger_on_payload': 'canusb.capture',
+    'trigger_on_errors': 'canusb.capture',
+    'ShmPublisher': 'canusb.shm',
+    'ShmSubscriber': 'canusb.shm',
+    'PriorityTxQueue': 'canusb.txqueue',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError("module 'canusb' has no attribute '{}'".format(name))
+
+    import importlib
+    return getattr(importlib.import_module(_LAZY[name]), name)
@@ -0,0 +1,5 @@
+import sys
+
+from canusb.cli import main
+
+sys.exit(main(['canusb'] + sys.argv[1:]))
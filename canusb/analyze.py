@@ -0,0 +1,286 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from canusb.protocol import CANUSB_RECORD, CANUSB_RECORD_FLAG_EXTENDED, can_frame_bits
+
+CHUNK_SIZE_DEFAULT = 64 * 1024 * 1024  # bytes
+
+RECORD_DTYPE = np.dtype([('ts', '<f8'), ('id', '<u4'), ('flags', 'u1'), ('dlc', 'u1'), ('data', '<u8')])
+assert RECORD_DTYPE.itemsize == CANUSB_RECORD.size
+
+
+def open_capture(path):
+    if path.endswith('.gz'):
+        import gzip
+        return gzip.open(path, 'rb')
+    if path.endswith('.xz'):
+        import lzma
+        return lzma.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def is_binary(path):
+    return '.bin' in os.path.basename(path)
+
+
+def plan_chunks(paths, chunk_size):
+    # Plain files are split at byte offsets, compressed segments are one chunk each.
+    chunks = []
+    for path in paths:
+        if path.endswith(('.gz', '.xz')):
+            chunks.append((path, 0, -1))
+            continue
+
+        size = os.path.getsize(path)
+        if is_binary(path):
+            chunk_size = max(chunk_size // CANUSB_RECORD.size, 1) * CANUSB_RECORD.size
+        for start in range(0, size, chunk_size):
+            chunks.append((path, start, min(start + chunk_size, size)))
+
+    return chunks
+
+
+# ASCII hex digit -> nibble value, everything else -> 0.
+HEX_NIBBLE = np.zeros(256, dtype=np.uint8)
+HEX_NIBBLE[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+HEX_NIBBLE[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+HEX_NIBBLE[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+
+# Offsets from the space after the timestamp, as written by format_frame().
+FRAME_ID_OFFSET = 11  # " Frame ID: " -> 4 hex digits
+FRAME_DATA_OFFSET = 23  # ", Data: " -> "hh " per byte
+UNKNOWN_BYTES_OFFSET = 10  # " Unknown: " -> "hh " per byte
+
+
+def read_text_block(path, start, end):
+    # Returns the bytes of every line that starts inside [start, end).
+    with open_capture(path) as f:
+        if end < 0:
+            return f.read()
+
+        f.seek(start)
+        block = f.read(end - start)
+        if not block.endswith(b'\n'):
+            block += f.readline()
+        if start:
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                # The first line started in the previous chunk.
+                block = block[block.find(b'\n') + 1:] if b'\n' in block else b''
+
+    return block
+
+
+def hex_bytes(buf, pos):
+    pos = np.minimum(pos, len(buf) - 2)
+    return (HEX_NIBBLE[buf[pos]] << 4) | HEX_NIBBLE[buf[pos + 1]]
+
+
+def read_text_chunk(path, start, end):
+    """Parse dump text with NumPy column arithmetic instead of a per-line loop.
+
+    Data frames are "TS Frame ID: IIII, Data: hh ...". format_frame() prints
+    frames without payload (DLC 0) as "TS Unknown: aa c0 ll hh 55", so those
+    are recognised as data frames too. Every other line is skipped.
+    """
+    block = read_text_block(path, start, end)
+    if not block.endswith(b'\n'):
+        block += b'\n'
+    buf = np.frombuffer(block + b'\n\n', dtype=np.uint8)
+    size = len(block)
+
+    ends = np.flatnonzero(buf[:size] == ord('\n'))
+    starts = np.r_[0, ends[:-1] + 1]
+    # Timestamps nearly always have the same width, so guess the column of
+    # the first space from the first line and only search where that misses.
+    width = block.find(b' ')
+    space = np.minimum(starts + max(width, 0), size)
+    missed = np.flatnonzero((buf[space] != ord(' ')) | (space >= ends))
+    if len(missed):
+        spaces = np.flatnonzero(buf[:size] == ord(' '))
+        first = np.minimum(np.searchsorted(spaces, starts[missed]), max(len(spaces) - 1, 0))
+        space[missed] = spaces[first] if len(spaces) else size
+    has_space = (space < ends) & (space - starts >= 8) & (buf[np.maximum(space - 7, 0)] == ord('.'))
+    probe = np.minimum(space + 7, size)
+
+    frame = has_space & (buf[np.minimum(space + 1, size)] == ord('F')) & (buf[probe] == ord('I'))
+    unknown = has_space & (buf[np.minimum(space + 1, size)] == ord('U')) & \
+        (ends - space - UNKNOWN_BYTES_OFFSET == 15)
+    if unknown.any():
+        u = space + UNKNOWN_BYTES_OFFSET
+        unknown &= (hex_bytes(buf, u) == 0xaa) & ((hex_bytes(buf, u + 3) & 0xdf) == 0xc0) & \
+            (hex_bytes(buf, u + 12) == 0x55)
+
+    keep = frame | unknown
+    space, line_start, line_end, unknown = space[keep], starts[keep], ends[keep], unknown[keep]
+    count = len(space)
+
+    # Timestamp: integer digits before the dot, six fraction digits after it.
+    dot = space - 7
+    ts = np.zeros(count)
+    for k in range(1, 7):
+        ts += (buf[dot + k].astype(np.float64) - ord('0')) * 10.0 ** -k
+    scale = 1.0
+    for k in range(1, int((dot - line_start).max(initial=0)) + 1):
+        digit = dot - k >= line_start
+        ts += np.where(digit, buf[np.maximum(dot - k, 0)].astype(np.float64) - ord('0'), 0.0) * scale
+        scale *= 10.0
+
+    id_pos = space + FRAME_ID_OFFSET
+    ids = (hex_bytes(buf, id_pos).astype(np.uint32) << 8) | hex_bytes(buf, id_pos + 2)
+    u = space + UNKNOWN_BYTES_OFFSET
+    ids = np.where(unknown, (hex_bytes(buf, u + 9).astype(np.uint32) << 8) | hex_bytes(buf, u + 6), ids)
+
+    dlc = np.where(unknown, 0, (line_end - space - FRAME_DATA_OFFSET) // 3)
+    dlc = np.clip(dlc, 0, 8)
+    payload = np.zeros((count, 8), dtype=np.uint8)
+    for k in range(8):
+        payload[:, k] = np.where(k < dlc, hex_bytes(buf, space + FRAME_DATA_OFFSET + 3 * k), 0)
+    data = payload.view('<u8').ravel()
+
+    records = np.empty(count, dtype=RECORD_DTYPE)
+    records['ts'] = ts
+    records['id'] = ids
+    records['flags'] = 0
+    records['dlc'] = dlc
+    records['data'] = data
+    return records
+
+
+def read_binary_chunk(path, start, end):
+    if end < 0:
+        with open_capture(path) as f:
+            return np.frombuffer(f.read(), dtype=RECORD_DTYPE)
+
+    return np.fromfile(path, dtype=RECORD_DTYPE, count=(end - start) // CANUSB_RECORD.size, offset=start)
+
+
+def analyze_chunk(chunk):
+    path, start, end = chunk
+    records = read_binary_chunk(path, start, end) if is_binary(path) else read_text_chunk(path, start, end)
+    if len(records) == 0:
+        return None
+
+    order = np.argsort(records['id'], kind='stable')
+    ids = records['id'][order]
+    ts = records['ts'][order]
+    dlc = records['dlc'][order]
+    data = records['data'][order]
+    extended = (records['flags'][order] & CANUSB_RECORD_FLAG_EXTENDED) != 0
+
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    ends = np.r_[starts[1:], len(ids)]
+    group = np.repeat(np.arange(len(starts)), ends - starts)
+    groups = len(starts)
+
+    same = group[1:] == group[:-1]
+    period = np.diff(ts)[same]
+    period_group = group[1:][same]
+    max_period = np.zeros(groups)
+    np.maximum.at(max_period, period_group, period)
+    changed = same & ((data[1:] != data[:-1]) | (dlc[1:] != dlc[:-1]))
+
+    return {
+        'id': ids[starts],
+        'count': ends - starts,
+        'bits': np.bincount(group, weights=can_frame_bits(dlc.astype(np.int64), extended), minlength=groups),
+        'first_ts': ts[starts],
+        'last_ts': ts[ends - 1],
+        'first_data': np.stack((data[starts], dlc[starts]), axis=1),
+        'last_data': np.stack((data[ends - 1], dlc[ends - 1]), axis=1),
+        'changes': np.bincount(group[1:][changed], minlength=groups),
+        'periods': np.bincount(period_group, minlength=groups),
+        'period_sum': np.bincount(period_group, weights=period, minlength=groups),
+        'period_sumsq': np.bincount(period_group, weights=period * period, minlength=groups),
+        'max_period': max_period,
+        'start': records['ts'].min(),
+        'end': records['ts'].max(),
+    }
+
+
+def merge_results(chunks, results):
+    """Combine per-chunk results into per-ID statistics and the captured duration.
+
+    Chunks of one file are stitched in file order. Files are taken in order of
+    their first timestamp, whatever the order they were given in, and periods
+    are not carried across files, since they may be separate captures. The
+    duration is the sum of the time spanned by each file.
+    """
+    files = {}
+    for (path, _, _), result in zip(chunks, results):
+        if result is not None:
+            files.setdefault(path, []).append(result)
+
+    stats = {}
+    duration = 0.0
+    for file_results in sorted(files.values(), key=lambda rs: min(r['start'] for r in rs)):
+        duration += max(r['end'] for r in file_results) - min(r['start'] for r in file_results)
+        for s in stats.values():
+            s['last_ts'] = None
+        merge_file(stats, file_results)
+
+    return stats, duration
+
+
+def merge_file(stats, results):
+    for result in results:
+        for i, can_id in enumerate(result['id'].tolist()):
+            s = stats.get(can_id)
+            if s is None:
+                stats[can_id] = s = {'count': 0, 'bits': 0.0, 'changes': 0, 'periods': 0,
+                                     'period_sum': 0.0, 'period_sumsq': 0.0, 'max_period': 0.0,
+                                     'last_ts': None, 'last_data': None}
+            elif s['last_ts'] is not None:
+                # Chunks of a file arrive in capture order, so stitch the period across the boundary.
+                gap = result['first_ts'][i] - s['last_ts']
+                s['periods'] += 1
+                s['period_sum'] += gap
+                s['period_sumsq'] += gap * gap
+                s['max_period'] = max(s['max_period'], gap)
+                if tuple(result['first_data'][i]) != s['last_data']:
+                    s['changes'] += 1
+
+            for key in ('count', 'bits', 'changes', 'periods', 'period_sum', 'period_sumsq'):
+                s[key] += result[key][i]
+            s['max_period'] = max(s['max_period'], result['max_period'][i])
+            s['last_ts'] = result['last_ts'][i]
+            s['last_data'] = tuple(result['last_data'][i])
+
+
+def print_report(stats, duration, speed):
+    total_bits = sum(s['bits'] for s in stats.values())
+    total_frames = sum(s['count'] for s in stats.values())
+
+    sys.stdout.write("Frames: {}, Duration: {:.3f} s".format(total_frames, duration))
+    if duration > 0:
+        load = 100.0 * total_bits / (duration * speed)
+        sys.stdout.write(", Bus load: {:.2f} % of {} bps".format(load, speed))
+    sys.stdout.write("\n\n")
+
+    sys.stdout.write("{:>8} {:>10} {:>10} {:>12} {:>12} {:>12} {:>10}\n".format(
+        "ID", "Frames", "Rate/s", "Period ms", "Jitter ms", "Max gap ms", "Changes"))
+    for can_id in sorted(stats):
+        s = stats[can_id]
+        mean = s['period_sum'] / s['periods'] if s['periods'] else 0.0
+        jitter = max(s['period_sumsq'] / s['periods'] - mean * mean, 0.0) ** 0.5 if s['periods'] else 0.0
+        rate = s['count'] / duration if duration > 0 else 0.0
+        sys.stdout.write("{:>8x} {:>10d} {:>10.2f} {:>12.3f} {:>12.3f} {:>12.3f} {:>10d}\n".format(
+            can_id, int(s['count']), rate, mean * 1000, jitter * 1000, s['max_period'] * 1000,
+            int(s['changes'])))
+
+
+def analyze(paths, speed, jobs=None, chunk_size=None):
+    jobs = jobs or os.cpu_count()
+    chunks = plan_chunks(paths, chunk_size or CHUNK_SIZE_DEFAULT)
+    if jobs > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(analyze_chunk, chunks))
+    else:
+        results = [analyze_chunk(chunk) for chunk in chunks]
+
+    print_report(*merge_results(chunks, results), speed)
+
+    return 0
@@ -0,0 +1,217 @@
+import sys
+import time
+
+from canusb.protocol import CANUSB_TTY_BAUD_RATE_DEFAULT, CANUSB_INJECT_SLEEP_GAP_DEFAULT, \
+    CANUSB_FRAME_LEN_MAX, CANUSB_MODE, CANUSB_FRAME, CANUSB_PAYLOAD_MODE, canusb_int_to_speed, \
+    frame_is_complete, command_frame, data_frame, format_frame
+
+
+class Bus:
+    """One USB-CAN-A adapter and everything that used to live in module globals.
+
+    Methods follow the C tool's conventions: errors are reported on stderr and
+    returned as -1. stop() may be called from a signal handler to end a running
+    dump or inject loop.
+    """
+
+    def __init__(self, device, speed=500000, baudrate=CANUSB_TTY_BAUD_RATE_DEFAULT,
+                 mode=CANUSB_MODE['CANUSB_MODE_NORMAL'], frame=CANUSB_FRAME['CANUSB_FRAME_STANDARD']):
+        self.device = device
+        self.speed = speed
+        self.baudrate = baudrate
+        self.mode = mode
+        self.frame = frame
+        self.tty_fd = None
+        self.throttle = None
+        self.running = True
+
+    def open(self):
+        import serial
+
+        try:
+            self.tty_fd = serial.Serial(self.device, self.baudrate, timeout=0)
+        except serial.SerialException as e:
+            sys.stderr.write("open({}) failed: {}\n".format(self.device, str(e)))
+            self.running = False
+            return -1
+
+        return 0
+
+    def close(self):
+        if self.tty_fd is not None:
+            self.tty_fd.close()
+            self.tty_fd = None
+
+    def stop(self, *args):
+        self.running = False
+
+    def set_max_load(self, max_load):
+        from canusb.throttle import BusThrottle
+
+        self.throttle = BusThrottle(self.speed, max_load) if max_load else None
+
+    def utilization(self):
+        # Share of the bus in % used by our frames recently, None when not throttled.
+        return self.throttle.utilization() if self.throttle is not None else None
+
+    def frame_send(self, frame):
+        try:
+            return self.tty_fd.write(frame)
+        except OSError as e:
+            sys.stderr.write("write() failed: {}\n".format(str(e)))
+            return -1
+
+    def frame_recv(self, frame_len_max=CANUSB_FRAME_LEN_MAX):
+        frame = bytearray()
+        while self.running:
+            byte = self.tty_fd.read(1)
+            if not byte:
+                time.sleep(0.01)  # Wait for data
+                continue
+
+            frame.append(byte[0])
+
+            if frame_is_complete(frame):
+                break
+
+            if len(frame) == frame_len_max:
+                sys.stderr.write("frame_recv() failed: Overflow\n")
+                return -1
+
+        return frame
+
+    def command_settings(self, speed=None, mode=None, frame=None):
+        if speed is not None:
+            self.speed = speed
+        if mode is not None:
+            self.mode = mode
+        if frame is not None:
+            self.frame = frame
+
+        speed_code = canusb_int_to_speed(self.speed)
+        if speed_code == 0:
+            sys.stderr.write("Please specify a valid speed!\n")
+            return -1
+
+        if self.frame_send(command_frame(speed_code, self.mode, self.frame)) < 0:
+            return -1
+
+        return 0
+
+    def send_data_frame(self, can_id, data, data_length_code, frame=CANUSB_FRAME['CANUSB_FRAME_STANDARD']):
+        if not 0 <= data_length_code <= 8:
+            sys.stderr.write("Data length code (DLC) must be between 0 and 8!\n")
+            return -1
+
+        if self.throttle is not None:
+            self.throttle.wait(data_length_code, frame == CANUSB_FRAME['CANUSB_FRAME_EXTENDED'])
+
+        frame_bytes = data_frame(frame, can_id & 0xff, (can_id >> 8) & 0xff, data, data_length_code)
+        if self.frame_send(frame_bytes) < 0:
+            sys.stderr.write("Unable to send frame!\n")
+            return -1
+
+        return 0
+
+    def inject_data_frames(self, can_id, data,
+                           payload_mode=CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_FIXED'],
+                           sleep_gap=CANUSB_INJECT_SLEEP_GAP_DEFAULT, count=0, seed=None):
+        binary_data = bytearray(data)
+        data_len = len(binary_data)
+        gap = sleep_gap / 1000
+        pool = None
+
+        if payload_mode == CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_RANDOM']:
+            from canusb.payload import PayloadPool
+            pool = PayloadPool(seed=seed)
+
+        sent = 0
+        while self.running and (not count or sent < count):
+            if gap:
+                time.sleep(gap)
+
+            if pool is not None:
+                binary_data[:] = pool.take(data_len)
+            elif payload_mode == CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_INCREMENTAL']:
+                for i in range(data_len):
+                    binary_data[i] = (binary_data[i] + 1) & 0xff
+
+            if self.send_data_frame(can_id, binary_data, data_len, self.frame) == -1:
+                return -1
+            sent += 1
+
+        return 0
+
+    def fuzz_data_frames(self, first_id, last_id, first_dlc, last_dlc, sleep_gap=0, count=0, seed=None):
+        """Send random payloads while sweeping over an ID range and a DLC range.
+
+        IDs advance every frame; the DLC advances every time the ID range wraps.
+        IDs above 7ff are sent as extended frames, the others as standard ones.
+        """
+        from canusb.payload import PayloadPool
+
+        if not (0 <= first_dlc <= last_dlc <= 8):
+            sys.stderr.write("DLC sweep must be within 0 and 8!\n")
+            return -1
+
+        # The adapter's data frame carries two ID bytes.
+        if not (0 <= first_id <= last_id <= 0xffff):
+            sys.stderr.write("ID sweep must be ascending and within 0 and ffff!\n")
+            return -1
+
+        pool = PayloadPool(seed=seed)
+        standard, extended = CANUSB_FRAME['CANUSB_FRAME_STANDARD'], CANUSB_FRAME['CANUSB_FRAME_EXTENDED']
+        gap = sleep_gap / 1000
+        can_id, dlc = first_id, first_dlc
+
+        sent = 0
+        while self.running and (not count or sent < count):
+            if gap:
+                time.sleep(gap)
+
+            frame_type = extended if can_id > 0x7ff else standard
+            if self.send_data_frame(can_id, pool.take(dlc), dlc, frame_type) == -1:
+                return -1
+            sent += 1
+
+            if can_id < last_id:
+                can_id += 1
+            else:
+                can_id = first_id
+                dlc = dlc + 1 if dlc < last_dlc else first_dlc
+
+        return 0
+
+    def dump_data_frames(self, recorder=None, sink=None, changes=None, count=0, out=None):
+        out = out or sys.stdout
+        received = 0
+
+        while self.running and (not count or received < count):
+            frame = self.frame_recv()
+
+            if not self.running:
+                break
+
+            ts = time.time()
+            received += 1
+
+            if recorder is not None:
+                path = recorder.record(ts, frame)
+                if path == -1:
+                    return -1
+                if path is not None:
+                    sys.stderr.write("Flight recorder window saved to {}\n".format(path))
+            elif changes is not None and not changes.accept(frame):
+                pass
+            elif sink is not None:
+                if sink.write(ts, frame) == -1:
+                    return -1
+            else:
+                out.write(format_frame(ts, frame))
+
+            if changes is not None:
+                summary = changes.summary(ts)
+                if summary is not None:
+                    out.write(summary)
+
+        return 0
@@ -0,0 +1,335 @@
+import os
+import sys
+import json
+import queue
+import threading
+import collections
+
+from canusb.protocol import format_frame, pack_record
+
+CANUSB_RECORDER_FRAMES_DEFAULT = 100000
+CANUSB_RECORDER_WINDOWS_MAX = 2  # windows waiting for the writer
+CANUSB_SEGMENT_BYTES_DEFAULT = 64 * 1024 * 1024
+CANUSB_SEGMENT_FLUSH_INTERVAL = 0.5  # s
+CANUSB_SEGMENT_COMPRESSIONS = ('gzip', 'lzma')
+CANUSB_CHANGES_SUMMARY_INTERVAL = 10.0  # s
+
+
+def trigger_on_id(can_id):
+    def trigger(ts, frame):
+        return frame != -1 and len(frame) >= 6 and ((frame[3] << 8) | frame[2]) == can_id
+    return trigger
+
+
+def trigger_on_payload(pattern):
+    pattern = bytes(pattern)
+
+    def trigger(ts, frame):
+        return frame != -1 and pattern in bytes(frame[4:-1])
+    return trigger
+
+
+def trigger_on_errors(count):
+    errors = [0]
+
+    def trigger(ts, frame):
+        if frame == -1:
+            errors[0] += 1
+        if errors[0] < count:
+            return False
+        errors[0] = 0
+        return True
+    return trigger
+
+
+class FlightRecorder:
+    """Keep the most recent frames in a fixed-size ring and persist them on a trigger.
+
+    The ring never holds more than max_frames entries, whatever the bus load;
+    max_seconds additionally drops entries older than that. Once the trigger
+    fires (or fire() is called, e.g. from a signal handler), the ring is frozen
+    and up to max_frames frames are collected separately until post_frames
+    frames or post_seconds seconds have passed. The whole window is then
+    handed to a background thread that writes it to a new file in the dump
+    text format, and the recorder re-arms. At most CANUSB_RECORDER_WINDOWS_MAX
+    windows wait for the writer; further windows are dropped until it catches
+    up. The trigger is ignored for holdoff seconds after a window, so a
+    trigger on a cyclic ID does not save a file per occurrence. close() saves
+    a window that is still collecting post-trigger frames.
+
+    record() returns the path of a saved window, or -1 once the writer failed.
+    """
+
+    def __init__(self, trigger=None, max_frames=CANUSB_RECORDER_FRAMES_DEFAULT, max_seconds=0,
+                 post_frames=0, post_seconds=0, path_prefix='flight', holdoff=0):
+        if max_frames < 1:
+            raise ValueError("Flight recorder ring size must be at least 1 frame")
+
+        self.trigger = trigger
+        self.max_frames = max_frames
+        self.ring = collections.deque(maxlen=max_frames)
+        self.post = None
+        self.max_seconds = max_seconds
+        self.post_frames = post_frames
+        self.post_seconds = post_seconds
+        self.path_prefix = path_prefix
+        self.holdoff = holdoff
+        self.armed_at = None
+        self.fired = False
+        self.triggered_at = None
+        self.error = None
+        self.windows = queue.Queue(maxsize=CANUSB_RECORDER_WINDOWS_MAX)
+        self.writer_thread = threading.Thread(target=self.writer_loop, daemon=True)
+        self.writer_thread.start()
+
+    def fire(self):
+        self.fired = True
+
+    def record(self, ts, frame):
+        if self.error is not None:
+            return -1
+
+        entry = (ts, frame if frame == -1 else bytes(frame))
+
+        if self.triggered_at is None:
+            ring = self.ring
+            ring.append(entry)
+            if self.max_seconds:
+                while ts - ring[0][0] > self.max_seconds:
+                    ring.popleft()
+            if self.fired:
+                self.fired = False
+            elif self.trigger is None or (self.armed_at is not None and ts < self.armed_at) or \
+                    not self.trigger(ts, frame):
+                return None
+            self.triggered_at = ts
+            self.post = []
+        else:
+            self.post.append(entry)
+
+        collected = len(self.post)
+        if collected < self.max_frames and \
+                (collected < self.post_frames or ts - self.triggered_at < self.post_seconds):
+            return None
+
+        self.armed_at = ts + self.holdoff
+        return self.persist()
+
+    def persist(self):
+        path = "{}-{:.6f}.log".format(self.path_prefix, self.triggered_at)
+        try:
+            self.windows.put_nowait((path, self.ring, self.post))
+        except queue.Full:
+            sys.stderr.write("Flight recorder writer is behind, window {} dropped\n".format(path))
+            path = None
+
+        self.ring = collections.deque(maxlen=self.max_frames)
+        self.post = None
+        self.triggered_at = None
+        return path
+
+    def writer_loop(self):
+        while True:
+            window = self.windows.get()
+            if window is None:
+                break
+            path, ring, post = window
+            try:
+                if self.error is None:
+                    with open(path, 'w') as f:
+                        f.writelines(format_frame(ts, frame) for ts, frame in ring)
+                        f.writelines(format_frame(ts, frame) for ts, frame in post)
+            except OSError as e:
+                self.error = e
+            finally:
+                self.windows.task_done()
+
+    def close(self):
+        path = self.persist() if self.triggered_at is not None and self.error is None else None
+        self.windows.put(None)
+        self.writer_thread.join()
+
+        if self.error is not None:
+            sys.stderr.write("Flight recorder writer failed: {}\n".format(str(self.error)))
+            return -1
+
+        return path
+
+
+def compress_segment(path, compression):
+    if compression == 'gzip':
+        import gzip
+        opener, suffix = gzip.open, '.gz'
+    elif compression == 'lzma':
+        import lzma
+        opener, suffix = lzma.open, '.xz'
+    else:
+        return path
+
+    with open(path, 'rb') as src, opener(path + suffix, 'wb') as dst:
+        while True:
+            chunk = src.read(1 << 20)
+            if not chunk:
+                break
+            dst.write(chunk)
+    os.remove(path)
+
+    return path + suffix
+
+
+class SegmentWriter:
+    """Capture sink that rotates the dump into segments and compresses closed ones.
+
+    write() only appends the raw frame to an in-memory queue. A writer thread
+    formats frames (as dump text, or CANUSB_RECORD when binary) and writes them
+    to the current segment, rotating by size or age, and a second thread
+    compresses closed segments and appends their time range to a JSON-lines
+    manifest. compression is one of CANUSB_SEGMENT_COMPRESSIONS, or None to
+    keep segments uncompressed.
+    """
+
+    def __init__(self, path_prefix, max_bytes=CANUSB_SEGMENT_BYTES_DEFAULT, max_seconds=0, compression='gzip',
+                 binary=False):
+        if compression is not None and compression not in CANUSB_SEGMENT_COMPRESSIONS:
+            raise ValueError("Unknown segment compression: {}".format(compression))
+
+        self.path_prefix = path_prefix
+        self.binary = binary
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compression = compression
+        self.manifest_path = path_prefix + '.manifest'
+        self.pending = collections.deque()
+        self.closed = queue.Queue()
+        self.stopping = threading.Event()
+        self.index = 0
+        self.segment = None
+        self.error = None
+        self.writer_thread = threading.Thread(target=self.writer_loop, daemon=True)
+        self.compress_thread = threading.Thread(target=self.compress_loop, daemon=True)
+        self.writer_thread.start()
+        self.compress_thread.start()
+
+    def write(self, ts, frame):
+        if self.error is not None:
+            return -1
+
+        self.pending.append((ts, frame))
+        return 0
+
+    def open_segment(self, ts):
+        path = "{}-{:05d}.{}".format(self.path_prefix, self.index, 'bin' if self.binary else 'log')
+        self.index += 1
+        self.segment = {'path': path, 'file': open(path, 'wb' if self.binary else 'w'),
+                        'first': ts, 'last': ts, 'frames': 0, 'bytes': 0}
+
+    def close_segment(self):
+        segment = self.segment
+        segment['file'].close()
+        del segment['file']
+        self.segment = None
+        self.closed.put(segment)
+
+    def drain(self):
+        pending = self.pending
+        while pending:
+            ts, frame = pending.popleft()
+            segment = self.segment
+            if segment is not None and (segment['bytes'] >= self.max_bytes or
+                                        (self.max_seconds and ts - segment['first'] >= self.max_seconds)):
+                self.close_segment()
+                segment = None
+            if segment is None:
+                self.open_segment(ts)
+                segment = self.segment
+
+            line = pack_record(ts, frame) if self.binary else format_frame(ts, frame)
+            if line is None:
+                continue
+            segment['file'].write(line)
+            segment['last'] = ts
+            segment['frames'] += 1
+            segment['bytes'] += len(line)
+
+    def writer_loop(self):
+        try:
+            while not self.stopping.wait(CANUSB_SEGMENT_FLUSH_INTERVAL):
+                self.drain()
+            self.drain()
+            if self.segment is not None:
+                self.close_segment()
+        except OSError as e:
+            self.error = e
+            self.pending.clear()
+        finally:
+            self.closed.put(None)
+
+    def compress_loop(self):
+        while True:
+            segment = self.closed.get()
+            if segment is None:
+                break
+            try:
+                segment['path'] = compress_segment(segment['path'], self.compression)
+                with open(self.manifest_path, 'a') as f:
+                    f.write(json.dumps(segment) + '\n')
+            except OSError as e:
+                self.error = e
+
+    def close(self):
+        self.stopping.set()
+        self.writer_thread.join()
+        self.compress_thread.join()
+
+        if self.error is not None:
+            sys.stderr.write("Capture writer failed: {}\n".format(str(self.error)))
+            return -1
+
+        return 0
+
+
+class ChangeFilter:
+    """Pass a data frame only when its payload differs from the last one seen for its ID.
+
+    masks maps an ID to a bytes mask; only bits set in the mask are compared
+    (missing trailing mask bytes compare in full). A DLC change always passes.
+    Frames that are not data frames always pass.
+    """
+
+    def __init__(self, masks=None, summary_interval=CANUSB_CHANGES_SUMMARY_INTERVAL):
+        self.masks = {}
+        for can_id, mask in (masks or {}).items():
+            self.masks[bytes([can_id & 0xff, (can_id >> 8) & 0xff])] = mask
+        self.summary_interval = summary_interval
+        self.last = {}
+        self.suppressed = {}
+        self.next_summary = None
+
+    def accept(self, frame):
+        if frame == -1 or len(frame) < 6 or frame[0] != 0xaa or (frame[1] >> 4) not in (0xc, 0xe):
+            return True
+
+        key = bytes(frame[2:4])
+        payload = bytes(frame[4:-1])
+        mask = self.masks.get(key)
+        if mask is not None:
+            payload = bytes(b & m for b, m in zip(payload, mask.ljust(len(payload), b'\xff')))
+
+        if self.last.get(key) == payload:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return False
+
+        self.last[key] = payload
+        return True
+
+    def summary(self, ts):
+        if self.next_summary is None:
+            self.next_summary = ts + self.summary_interval
+        if ts < self.next_summary or not self.suppressed:
+            return None
+
+        self.next_summary = ts + self.summary_interval
+        counts = ", ".join("{:02x}{:02x}: {}".format(key[1], key[0], count)
+                           for key, count in sorted(self.suppressed.items(), key=lambda item: item[0][::-1]))
+        self.suppressed.clear()
+        return "{:.6f} Suppressed: {}\n".format(ts, counts)
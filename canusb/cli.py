@@ -0,0 +1,390 @@
+import sys
+
+from canusb.protocol import CANUSB_TTY_BAUD_RATE_DEFAULT, CANUSB_INJECT_SLEEP_GAP_DEFAULT, CANUSB_MODE, \
+    CANUSB_FRAME, CANUSB_PAYLOAD_MODE, CANUSB_SPEED, convert_from_hex, convert_id_from_hex
+
+# Options shared by every subcommand that talks to the adapter.
+COMMON_OPTS = "hd:s:b:n:"
+
+SUBCOMMAND_OPTS = {
+    'dump': COMMON_OPTS + "cM:r:F:S:A:H:w:z:BR:T:p:",
+    'inject': COMMON_OPTS + "i:j:g:m:e:I:L:l:",
+    'settings': COMMON_OPTS + "o:x",
+    'analyze': "hs:j:c:",
+}
+
+LEGACY_OPTS = "htd:s:b:i:j:n:g:m:"
+# Long options accepted by the old argparse based can_test.py.
+LEGACY_LONG_OPTS = {
+    'help': 'h',
+    'device': 'd',
+    'speed': 's',
+    'baudrate': 'b',
+    'id': 'i',
+    'data': 'j',
+    'gap': 'g',
+    'mode': 'm',
+}
+
+SETTINGS_MODES = {
+    'normal': CANUSB_MODE['CANUSB_MODE_NORMAL'],
+    'loopback': CANUSB_MODE['CANUSB_MODE_LOOPBACK'],
+    'silent': CANUSB_MODE['CANUSB_MODE_SILENT'],
+    'loopback-silent': CANUSB_MODE['CANUSB_MODE_LOOPBACK_SILENT'],
+}
+
+
+def display_help(progname):
+    from canusb.capture import CANUSB_RECORDER_FRAMES_DEFAULT, CANUSB_SEGMENT_BYTES_DEFAULT
+    from canusb.throttle import CANUSB_BUS_LOAD_MAX_DEFAULT
+
+    sys.stderr.write("Usage: {0} dump|inject|settings|analyze <options>\n"
+                     "Common options:\n"
+                     "  -h          Display this help and exit.\n"
+                     "  -d DEVICE   Use TTY DEVICE.\n"
+                     "  -s SPEED    Set CAN SPEED in bps.\n"
+                     "  -b BAUDRATE Set TTY/serial BAUDRATE (default: {1}).\n"
+                     "  -n COUNT    Terminate after COUNT frames (default: infinite).\n"
+                     "dump options:\n"
+                     "  -c          Only print frames whose payload changed.\n"
+                     "  -M ID:MASK  Compare only the MASK bits of ID in change mode (hex, repeatable).\n"
+                     "  -r TRIGGER  Flight recorder; TRIGGER is id=ID, data=HEX, errors=N\n"
+                     "              or signal (SIGUSR1).\n"
+                     "  -F FRAMES   Flight recorder ring size in frames (default: {2}).\n"
+                     "  -S SECONDS  Flight recorder pre-trigger window in seconds.\n"
+                     "  -A FRAMES   Flight recorder frames kept after the trigger (at most -F).\n"
+                     "  -H SECONDS  Flight recorder hold-off: ignore the trigger for SECONDS after\n"
+                     "              a saved window.\n"
+                     "  -w PREFIX   Write rotating capture segments to PREFIX-NNNNN.\n"
+                     "  -z METHOD   Segment compression: gzip, lzma or none (default: gzip).\n"
+                     "  -B          Write binary records instead of dump text.\n"
+                     "  -R BYTES    Rotate segments after BYTES (default: {3}).\n"
+                     "  -T SECONDS  Rotate segments after SECONDS.\n"
+                     "  -p NAME     Publish frames to the shared memory ring NAME.\n"
+                     "inject options:\n"
+                     "  -i ID       Inject using ID (specified as hex string).\n"
+                     "  -j DATA     CAN DATA to inject (specified as hex string).\n"
+                     "  -g MS       Inject sleep gap in MS milliseconds (default: {4} ms, 0 in fuzz mode).\n"
+                     "  -m MODE     Inject payload MODE ({5} = random, {6} = incremental, {7} = fixed,\n"
+                     "              {8} = fuzz).\n"
+                     "  -e SEED     Seed for reproducible random and fuzz payloads.\n"
+                     "  -I ID-ID    Fuzz ID sweep range (hex).\n"
+                     "  -L DLC-DLC  Fuzz DLC sweep range.\n"
+                     "  -l PERCENT  Cap offered bus load at PERCENT of capacity, 0 = off (default: {9}).\n"
+                     "settings options:\n"
+                     "  -o MODE     Adapter mode: {10} (default: normal).\n"
+                     "  -x          Use extended frames.\n"
+                     "analyze options:\n"
+                     "  {0} analyze [-s SPEED] [-j JOBS] [-c CHUNK_BYTES] FILE...\n"
+                     "              Files are ordered by their first timestamp; periods are not\n"
+                     "              measured across files.\n"
+                     "\n".format(progname, CANUSB_TTY_BAUD_RATE_DEFAULT, CANUSB_RECORDER_FRAMES_DEFAULT,
+                                 CANUSB_SEGMENT_BYTES_DEFAULT,
+                                 CANUSB_INJECT_SLEEP_GAP_DEFAULT,
+                                 CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_RANDOM'],
+                                 CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_INCREMENTAL'],
+                                 CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_FIXED'],
+                                 CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_FUZZ'],
+                                 CANUSB_BUS_LOAD_MAX_DEFAULT, ", ".join(SETTINGS_MODES)))
+
+
+def parse_options(args, optstring, longopts=None):
+    # getopt-compatible short option parsing; getopt itself pulls in gettext
+    # and re, which would more than double the CLI's startup time. longopts
+    # maps --name to the short option it stands for.
+    opts = []
+    while args and args[0].startswith('-') and args[0] != '-':
+        if args[0] == '--':
+            return opts, args[1:]
+        if args[0].startswith('--'):
+            name, eq, value = args[0][2:].partition('=')
+            if not longopts or name not in longopts:
+                raise ValueError("option --{} not recognized".format(name))
+            args = args[1:]
+            if not eq and optstring[optstring.find(longopts[name]) + 1:][:1] == ':':
+                if not args:
+                    raise ValueError("option --{} requires argument".format(name))
+                value, args = args[0], args[1:]
+            opts.append(('-' + longopts[name], value))
+            continue
+        arg, args = args[0][1:], args[1:]
+        while arg:
+            opt, arg = arg[0], arg[1:]
+            i = optstring.find(opt)
+            if opt == ':' or i < 0:
+                raise ValueError("option -{} not recognized".format(opt))
+            if optstring[i + 1:i + 2] == ':':
+                if not arg:
+                    if not args:
+                        raise ValueError("option -{} requires argument".format(opt))
+                    arg, args = args[0], args[1:]
+                opts.append(('-' + opt, arg))
+                break
+            opts.append(('-' + opt, ''))
+
+    return opts, args
+
+
+def parse_range(arg, base):
+    first, _, last = arg.partition('-')
+    return int(first, base), int(last or first, base)
+
+
+def parse_hex_data(arg):
+    data = bytearray(8)
+    return data[:convert_from_hex(arg, data)]
+
+
+def open_bus(options, progname):
+    from canusb.bus import Bus
+
+    if 'd' not in options:
+        sys.stderr.write("Please specify a TTY!\n")
+        display_help(progname)
+        return None
+
+    speed = int(options.get('s', 0))
+    if speed not in CANUSB_SPEED:
+        sys.stderr.write("Please specify a valid speed!\n")
+        display_help(progname)
+        return None
+
+    bus = Bus(options['d'], speed, int(options.get('b', CANUSB_TTY_BAUD_RATE_DEFAULT)))
+    if bus.open() == -1:
+        return None
+
+    import signal
+    signal.signal(signal.SIGTERM, bus.stop)
+    signal.signal(signal.SIGHUP, bus.stop)
+    signal.signal(signal.SIGINT, bus.stop)
+
+    return bus
+
+
+def make_recorder(options):
+    from canusb.capture import FlightRecorder, CANUSB_RECORDER_FRAMES_DEFAULT, trigger_on_id, \
+        trigger_on_payload, trigger_on_errors
+
+    kind, _, value = options['r'].partition('=')
+    if kind == 'id':
+        trigger = trigger_on_id(int(value, 16))
+    elif kind == 'data':
+        trigger = trigger_on_payload(parse_hex_data(value))
+    elif kind == 'errors':
+        trigger = trigger_on_errors(int(value))
+    elif kind == 'signal':
+        trigger = None
+    else:
+        return None
+
+    return FlightRecorder(trigger, max_frames=int(options.get('F', CANUSB_RECORDER_FRAMES_DEFAULT)),
+                          max_seconds=float(options.get('S', 0)), post_frames=int(options.get('A', 0)),
+                          holdoff=float(options.get('H', 0)))
+
+
+def command_dump(options, repeated, progname):
+    recorder, sink, changes = None, None, None
+
+    # The flight recorder, the segment writer and the shared memory publisher
+    # each consume the frame stream; the change filter only feeds the latter two.
+    if sum(opt in options for opt in 'rwp') > 1 or ('r' in options and 'c' in options):
+        sys.stderr.write("Options -r, -w and -p exclude each other, and -c cannot be used with -r!\n")
+        display_help(progname)
+        return 2
+
+    if 'r' in options:
+        recorder = make_recorder(options)
+        if recorder is None:
+            sys.stderr.write("Unknown flight recorder trigger: {}\n".format(options['r']))
+            return 2
+
+    if 'c' in options:
+        from canusb.capture import ChangeFilter
+        masks = {}
+        for arg in repeated.get('M', []):
+            can_id, _, mask = arg.partition(':')
+            masks[int(can_id, 16)] = bytes(parse_hex_data(mask))
+        changes = ChangeFilter(masks)
+
+    # Sinks are set up first so that a ring name held by another publisher is
+    # reported before the adapter is touched.
+    if 'w' in options:
+        from canusb.capture import SegmentWriter, CANUSB_SEGMENT_BYTES_DEFAULT, CANUSB_SEGMENT_COMPRESSIONS
+        compression = options.get('z', 'gzip')
+        if compression != 'none' and compression not in CANUSB_SEGMENT_COMPRESSIONS:
+            sys.stderr.write("Unknown segment compression: {}\n".format(compression))
+            return 2
+        sink = SegmentWriter(options['w'], int(options.get('R', CANUSB_SEGMENT_BYTES_DEFAULT)),
+                             float(options.get('T', 0)), None if compression == 'none' else compression,
+                             'B' in options)
+    elif 'p' in options:
+        from canusb.shm import ShmPublisher
+        sink = ShmPublisher(options['p'])
+
+    bus = open_bus(options, progname)
+    if bus is None or bus.command_settings() == -1:
+        if recorder is not None:
+            recorder.close()
+        if sink is not None:
+            sink.close()
+        if bus is not None:
+            bus.close()
+        return 1
+
+    if recorder is not None:
+        import signal
+        signal.signal(signal.SIGUSR1, lambda signum, frame: recorder.fire())
+
+    try:
+        error = bus.dump_data_frames(recorder, sink, changes, int(options.get('n', 0)))
+    finally:
+        if recorder is not None:
+            path = recorder.close()
+            if path == -1:
+                error = -1
+            elif path is not None:
+                sys.stderr.write("Flight recorder window saved to {}\n".format(path))
+        if sink is not None and sink.close() == -1:
+            error = -1
+        bus.close()
+
+    return 1 if error == -1 else 0
+
+
+def command_inject(options, repeated, progname):
+    payload_mode = int(options.get('m', CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_FIXED']))
+    # Fuzzing runs at full rate by default and is paced by the bus load cap alone.
+    fuzz = payload_mode == CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_FUZZ']
+    sleep_gap = float(options.get('g', 0 if fuzz else CANUSB_INJECT_SLEEP_GAP_DEFAULT))
+    count = int(options.get('n', 0))
+    seed = int(options['e']) if 'e' in options else None
+
+    if 'i' not in options:
+        sys.stderr.write("Please specify a ID for injection!\n")
+        display_help(progname)
+        return 2
+    can_id = convert_id_from_hex(options['i'])
+    if can_id == -1:
+        sys.stderr.write("Unable to convert ID from hex to binary!\n")
+        return 1
+
+    data = parse_hex_data(options.get('j', ''))
+    if not data and not fuzz:
+        sys.stderr.write("Unable to convert data from hex to binary!\n")
+        return 1
+
+    if 'l' in options:
+        max_load = float(options['l'])
+    else:
+        from canusb.throttle import CANUSB_BUS_LOAD_MAX_DEFAULT
+        max_load = CANUSB_BUS_LOAD_MAX_DEFAULT
+    if not 0 <= max_load <= 100:
+        sys.stderr.write("Bus load cap must be between 0 and 100!\n")
+        return 2
+
+    bus = open_bus(options, progname)
+    if bus is None:
+        return 1
+    if bus.command_settings() == -1:
+        bus.close()
+        return 1
+    bus.set_max_load(max_load)
+
+    try:
+        if fuzz:
+            first_id, last_id = parse_range(options['I'], 16) if 'I' in options else (can_id, can_id)
+            first_dlc, last_dlc = parse_range(options['L'], 10) if 'L' in options else (len(data), len(data))
+            error = bus.fuzz_data_frames(first_id, last_id, first_dlc, last_dlc, sleep_gap, count, seed)
+        else:
+            error = bus.inject_data_frames(can_id, data, payload_mode, sleep_gap, count, seed)
+    finally:
+        utilization = bus.utilization()
+        if utilization is not None:
+            sys.stderr.write("Bus load over the last second: {:.2f} % of {} bps\n".format(
+                utilization, bus.speed))
+        bus.close()
+
+    return 1 if error == -1 else 0
+
+
+def command_settings(options, repeated, progname):
+    if options.get('o', 'normal') not in SETTINGS_MODES:
+        sys.stderr.write("Unknown mode: {}\n".format(options['o']))
+        return 2
+
+    bus = open_bus(options, progname)
+    if bus is None:
+        return 1
+
+    frame = CANUSB_FRAME['CANUSB_FRAME_EXTENDED'] if 'x' in options else CANUSB_FRAME['CANUSB_FRAME_STANDARD']
+    error = bus.command_settings(mode=SETTINGS_MODES[options.get('o', 'normal')], frame=frame)
+    bus.close()
+
+    return 1 if error == -1 else 0
+
+
+def command_analyze(options, repeated, progname, args):
+    from canusb.analyze import analyze
+
+    if not args:
+        display_help(progname)
+        return 2
+
+    speed = int(options.get('s', 500000))
+    if speed not in CANUSB_SPEED:
+        sys.stderr.write("Please specify a valid speed!\n")
+        return 2
+
+    return analyze(args, speed, int(options['j']) if 'j' in options else None,
+                   int(options['c']) if 'c' in options else None)
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    progname = argv[0]
+
+    try:
+        if len(argv) > 1 and argv[1] in SUBCOMMAND_OPTS:
+            command = argv[1]
+            opts, args = parse_options(argv[2:], SUBCOMMAND_OPTS[command])
+        else:
+            # The C tool's option set: dump, or inject when -j is given.
+            opts, args = parse_options(argv[1:], LEGACY_OPTS, LEGACY_LONG_OPTS)
+            command = 'inject' if any(opt == '-j' for opt, arg in opts) else 'dump'
+            opts = [(opt, arg) for opt, arg in opts if opt != '-t']
+    except ValueError as err:
+        sys.stderr.write(str(err) + '\n')
+        display_help(progname)
+        return 2
+
+    options, repeated = {}, {}
+    for opt, arg in opts:
+        options[opt[1]] = arg
+        repeated.setdefault(opt[1], []).append(arg)
+
+    if 'h' in options:
+        display_help(progname)
+        return 0
+
+    try:
+        if command == 'dump':
+            return command_dump(options, repeated, progname)
+        elif command == 'inject':
+            return command_inject(options, repeated, progname)
+        elif command == 'settings':
+            return command_settings(options, repeated, progname)
+        else:
+            return command_analyze(options, repeated, progname, args)
+    except BrokenPipeError:
+        # Output piped into e.g. head; keep the exit-time flush quiet.
+        import os
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (ValueError, OSError) as err:
+        sys.stderr.write(str(err) + '\n')
+        display_help(progname)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
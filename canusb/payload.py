@@ -0,0 +1,34 @@
+import os
+import random
+
+CANUSB_FUZZ_POOL_SIZE_DEFAULT = 1 << 20  # bytes
+
+
+class PayloadPool:
+    """Pre-generated block of random bytes handed out as payload slices.
+
+    Generating one large block in a single call and walking it keeps the
+    per-frame cost down to a slice, instead of one RNG call per byte.
+    Seeded pools are reproducible, unseeded pools are filled by os.urandom.
+    """
+
+    def __init__(self, size=CANUSB_FUZZ_POOL_SIZE_DEFAULT, seed=None):
+        self.size = size
+        self.rng = random.Random(seed) if seed is not None else None
+        self.offset = 0
+        self.block = None
+        self.refill()
+
+    def refill(self):
+        if self.rng is not None:
+            self.block = memoryview(self.rng.randbytes(self.size))
+        else:
+            self.block = memoryview(os.urandom(self.size))
+        self.offset = 0
+
+    def take(self, length):
+        if self.offset + length > self.size:
+            self.refill()
+        chunk = self.block[self.offset:self.offset + length]
+        self.offset += length
+        return chunk
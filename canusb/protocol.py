@@ -0,0 +1,163 @@
+import sys
+import struct
+
+CANUSB_INJECT_SLEEP_GAP_DEFAULT = 200  # ms
+CANUSB_TTY_BAUD_RATE_DEFAULT = 2000000
+CANUSB_FRAME_LEN_MAX = 32
+
+# Binary capture record: timestamp, ID, flags (bit 0 = extended), DLC, payload.
+CANUSB_RECORD = struct.Struct('<dIBB8s')
+CANUSB_RECORD_FLAG_EXTENDED = 0x01
+
+CANUSB_SPEED = {
+    1000000: 0x01,
+    800000: 0x02,
+    500000: 0x03,
+    400000: 0x04,
+    250000: 0x05,
+    200000: 0x06,
+    125000: 0x07,
+    100000: 0x08,
+    50000: 0x09,
+    20000: 0x0a,
+    10000: 0x0b,
+    5000: 0x0c
+}
+
+CANUSB_MODE = {
+    'CANUSB_MODE_NORMAL': 0x00,
+    'CANUSB_MODE_LOOPBACK': 0x01,
+    'CANUSB_MODE_SILENT': 0x02,
+    'CANUSB_MODE_LOOPBACK_SILENT': 0x03
+}
+
+CANUSB_FRAME = {
+    'CANUSB_FRAME_STANDARD': 0x01,
+    'CANUSB_FRAME_EXTENDED': 0x02
+}
+
+CANUSB_PAYLOAD_MODE = {
+    'CANUSB_INJECT_PAYLOAD_MODE_RANDOM': 0,
+    'CANUSB_INJECT_PAYLOAD_MODE_INCREMENTAL': 1,
+    'CANUSB_INJECT_PAYLOAD_MODE_FIXED': 2,
+    'CANUSB_INJECT_PAYLOAD_MODE_FUZZ': 3
+}
+
+
+def canusb_int_to_speed(speed):
+    return CANUSB_SPEED.get(speed, 0)
+
+
+def canusb_speed_to_int(speed):
+    for bitrate, code in CANUSB_SPEED.items():
+        if code == speed:
+            return bitrate
+    return 0
+
+
+def can_frame_bits(dlc, extended=False):
+    # SOF to CRC is subject to bit stuffing (worst case: one bit every four),
+    # CRC delimiter, ACK, EOF and interframe space add 13 fixed bits.
+    stuffable = 34 + 20 * extended + 8 * dlc
+    return stuffable + 13 + (stuffable - 1) // 4
+
+
+def generate_checksum(data):
+    return sum(data) & 0xff
+
+
+def frame_is_complete(frame):
+    if frame:
+        if frame[0] != 0xaa:
+            return True
+
+    if len(frame) < 2:
+        return False
+
+    if frame[1] == 0x55:  # Command frame...
+        if len(frame) >= 20:  # ...always 20 bytes.
+            return True
+        else:
+            return False
+    elif (frame[1] >> 4) in (0xc, 0xe):  # Data frame, standard or extended...
+        if len(frame) >= (frame[1] & 0xf) + 5:  # ...payload and 5 bytes.
+            return True
+        else:
+            return False
+
+    return True
+
+
+def command_frame(speed, mode, frame):
+    return bytearray([0xaa, 0x55, 0x12, speed, frame]) + bytearray(14) + bytearray([mode, 0x01]) + \
+        bytearray(4) + bytearray([generate_checksum([0x12, speed, frame, mode, 0x01])])
+
+
+def data_frame(frame, id_lsb, id_msb, data, data_length_code):
+    info = 0xc0  # Bit 7 Always 1, Bit 6 Always 1, Bit 4 0=Data
+    if frame == CANUSB_FRAME['CANUSB_FRAME_EXTENDED']:
+        info |= 0x20  # EXT frame
+    info |= data_length_code & 0x0f  # DLC=data_len
+
+    result = bytearray([0xaa, info, id_lsb, id_msb])  # Packet Start, Data Frame Information, ID
+    result += data[:data_length_code]  # Data
+    result.append(0x55)  # End of frame
+    return result
+
+
+def hex_value(c):
+    if 0x30 <= c <= 0x39:  # '0' - '9'
+        return c - 0x30
+    elif 0x41 <= c <= 0x46:  # 'A' - 'F'
+        return (c - 0x41) + 10
+    elif 0x61 <= c <= 0x66:  # 'a' - 'f'
+        return (c - 0x61) + 10
+    else:
+        return -1
+
+
+def convert_from_hex(hex_string, bin_string):
+    n1, n2, high = 0, 0, -1
+
+    while n1 < len(hex_string):
+        if hex_value(ord(hex_string[n1])) >= 0:
+            if high == -1:
+                high = ord(hex_string[n1])
+            else:
+                if n2 >= len(bin_string):
+                    sys.stdout.write("hex string truncated to {} bytes\n".format(n2))
+                    break
+                bin_string[n2] = hex_value(high) * 16 + hex_value(ord(hex_string[n1]))
+                n2 += 1
+                high = -1
+        n1 += 1
+
+    return n2
+
+
+def convert_id_from_hex(hex_id):
+    if not 1 <= len(hex_id) <= 3 or any(hex_value(ord(c)) < 0 for c in hex_id):
+        return -1
+
+    return int(hex_id, 16)
+
+
+def format_frame(ts, frame):
+    if frame == -1:
+        return "{:.6f} Frame recieve error!\n".format(ts)
+
+    frame_len = len(frame)
+    if frame_len >= 6 and frame[0] == 0xaa and (frame[1] >> 4) in (0xc, 0xe):
+        data = "".join("{:02x} ".format(frame[i]) for i in range(frame_len - 2, 3, -1))
+        return "{:.6f} Frame ID: {:02x}{:02x}, Data: {}\n".format(ts, frame[3], frame[2], data)
+
+    return "{:.6f} Unknown: {}\n".format(ts, "".join("{:02x} ".format(b) for b in frame))
+
+
+def pack_record(ts, frame):
+    if frame == -1 or len(frame) < 5 or frame[0] != 0xaa or frame[1] & 0xc0 != 0xc0:
+        return None
+
+    dlc = frame[1] & 0xf
+    flags = CANUSB_RECORD_FLAG_EXTENDED if frame[1] & 0x20 else 0
+    return CANUSB_RECORD.pack(ts, (frame[3] << 8) | frame[2], flags, dlc, bytes(frame[4:4 + dlc]))
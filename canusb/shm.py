@@ -0,0 +1,168 @@
+import os
+import time
+import struct
+from multiprocessing import shared_memory
+
+CANUSB_SHM_NAME_DEFAULT = 'canusb'
+CANUSB_SHM_SLOTS_DEFAULT = 65536
+
+# Ring header: magic, slot count, slot size, sequence number of the last published
+# frame, publisher pid.
+SHM_MAGIC = b'CANR'
+SHM_HEADER = struct.Struct('<4sIIQI')
+SHM_WRITE_SEQ_OFFSET = 12
+SHM_SEQ = struct.Struct('<Q')
+# Slot: sequence number, timestamp, ID, flags (bit 0 = extended), DLC, payload, padding.
+SHM_SLOT = struct.Struct('<QdIBB8s2x')
+SHM_FLAG_EXTENDED = 0x01
+
+
+def attach_shm(name):
+    # Subscribers must not unlink the publisher's segment when they exit. Before
+    # Python 3.13 that means dropping the resource tracker registration, which a
+    # subscriber forked from the publisher process shares with the publisher. A
+    # subscriber in the publishing process itself keeps the registration.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        untrack_shm(shm)
+        return shm
+
+
+def untrack_shm(shm):
+    from multiprocessing import resource_tracker
+
+    if shm.size < SHM_HEADER.size or SHM_HEADER.unpack_from(shm.buf, 0)[4] != os.getpid():
+        resource_tracker.unregister(shm._name, 'shared_memory')
+
+
+def remove_stale_ring(name):
+    # A ring left behind by a publisher that was killed is unlinked; anything
+    # else with that name is reported instead of being overwritten.
+    shm = shared_memory.SharedMemory(name=name)
+    magic, pid = None, 0
+    if shm.size >= SHM_HEADER.size:
+        magic, _, _, _, pid = SHM_HEADER.unpack_from(shm.buf, 0)
+
+    error = None
+    if magic != SHM_MAGIC:
+        error = "Shared memory {} exists and is not a CANUSB frame ring".format(name)
+    else:
+        try:
+            os.kill(pid, 0)
+            error = "Shared memory ring {} is in use by process {}".format(name, pid)
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            error = "Shared memory ring {} is in use by process {}".format(name, pid)
+
+    if error is None:
+        shm.close()
+        shm.unlink()
+        return
+
+    untrack_shm(shm)
+    shm.close()
+    raise FileExistsError(error)
+
+
+class ShmPublisher:
+    """Dump sink that publishes received frames into a shared memory ring.
+
+    Every frame gets a sequence number and lands in slot (seq - 1) % slots. The
+    publisher never waits for readers: the slot sequence number is cleared while
+    the slot is rewritten, so a reader that falls behind sees the mismatch and
+    counts an overrun instead.
+    """
+
+    def __init__(self, name=CANUSB_SHM_NAME_DEFAULT, slots=CANUSB_SHM_SLOTS_DEFAULT):
+        self.slots = slots
+        size = SHM_HEADER.size + slots * SHM_SLOT.size
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            remove_stale_ring(name)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.buf = self.shm.buf
+        self.seq = 0
+        SHM_HEADER.pack_into(self.buf, 0, SHM_MAGIC, slots, SHM_SLOT.size, 0, os.getpid())
+
+    def write(self, ts, frame):
+        if frame == -1 or len(frame) < 5 or frame[0] != 0xaa or frame[1] & 0xc0 != 0xc0:
+            return 0
+
+        seq = self.seq + 1
+        offset = SHM_HEADER.size + ((seq - 1) % self.slots) * SHM_SLOT.size
+        dlc = frame[1] & 0xf
+        flags = SHM_FLAG_EXTENDED if frame[1] & 0x20 else 0
+
+        SHM_SEQ.pack_into(self.buf, offset, 0)
+        SHM_SLOT.pack_into(self.buf, offset, 0, ts, (frame[3] << 8) | frame[2], flags, dlc,
+                           bytes(frame[4:4 + dlc]))
+        SHM_SEQ.pack_into(self.buf, offset, seq)
+        SHM_SEQ.pack_into(self.buf, SHM_WRITE_SEQ_OFFSET, seq)
+        self.seq = seq
+        return 0
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+        self.shm.unlink()
+        return 0
+
+
+class ShmSubscriber:
+    """Read frames published by ShmPublisher at the reader's own pace.
+
+    read() returns (ts, id, extended, data) tuples in publish order. Frames that
+    were overwritten before this reader got to them are skipped and added to
+    overruns. New subscribers start at the most recent frame.
+    """
+
+    def __init__(self, name=CANUSB_SHM_NAME_DEFAULT):
+        self.shm = attach_shm(name)
+        self.buf = self.shm.buf
+        magic, self.slots, slot_size, write_seq, _ = SHM_HEADER.unpack_from(self.buf, 0)
+        if magic != SHM_MAGIC or slot_size != SHM_SLOT.size:
+            self.close()
+            raise ValueError("Not a CANUSB frame ring: {}".format(name))
+        self.next_seq = write_seq + 1
+        self.overruns = 0
+
+    def read(self, max_frames=1024):
+        frames = []
+        write_seq = SHM_SEQ.unpack_from(self.buf, SHM_WRITE_SEQ_OFFSET)[0]
+
+        if write_seq - self.next_seq >= self.slots:
+            oldest = write_seq - self.slots + 1
+            self.overruns += oldest - self.next_seq
+            self.next_seq = oldest
+
+        while self.next_seq <= write_seq and len(frames) < max_frames:
+            offset = SHM_HEADER.size + ((self.next_seq - 1) % self.slots) * SHM_SLOT.size
+            seq, ts, can_id, flags, dlc, data = SHM_SLOT.unpack_from(self.buf, offset)
+            if seq != self.next_seq or SHM_SEQ.unpack_from(self.buf, offset)[0] != seq:
+                # Overwritten while we were reading it: resync to the oldest valid slot.
+                write_seq = SHM_SEQ.unpack_from(self.buf, SHM_WRITE_SEQ_OFFSET)[0]
+                oldest = max(write_seq - self.slots + 2, self.next_seq + 1)
+                self.overruns += oldest - self.next_seq
+                self.next_seq = oldest
+                continue
+
+            frames.append((ts, can_id, bool(flags & SHM_FLAG_EXTENDED), data[:dlc]))
+            self.next_seq += 1
+
+        return frames
+
+    def wait(self, timeout=None, interval=0.001):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            frames = self.read()
+            if frames or (deadline is not None and time.monotonic() >= deadline):
+                return frames
+            time.sleep(interval)
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
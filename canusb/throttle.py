@@ -0,0 +1,51 @@
+import time
+import collections
+
+from canusb.protocol import can_frame_bits
+
+CANUSB_BUS_LOAD_MAX_DEFAULT = 80  # % of bus capacity
+CANUSB_BUS_LOAD_WINDOW = 1.0  # s
+CANUSB_BUS_LOAD_BURST = 0.01  # s
+
+
+class BusThrottle:
+    """Pace transmitted frames so the offered load stays below max_load % of the bus.
+
+    Every frame is charged its estimated wire time at the configured bitrate and
+    the next frame is held back until that time, scaled by max_load, has passed.
+    utilization() reports the share of the bus used by our frames over the last
+    CANUSB_BUS_LOAD_WINDOW seconds. max_load must be above 0 and at most 100.
+    """
+
+    def __init__(self, bitrate, max_load=CANUSB_BUS_LOAD_MAX_DEFAULT):
+        if not 0 < max_load <= 100:
+            raise ValueError("Bus load cap must be above 0 and at most 100 %")
+
+        self.bitrate = bitrate
+        self.max_load = max_load
+        self.next_time = 0.0
+        self.sent = collections.deque()
+        self.sent_bits = 0
+
+    def wait(self, dlc, extended=False):
+        bits = can_frame_bits(dlc, extended)
+        now = time.monotonic()
+        if self.next_time > now:
+            time.sleep(self.next_time - now)
+        # Sleep overshoot is paid back by the following frames, but only for a
+        # short burst so an idle transmitter does not build up credit.
+        start = max(self.next_time, now - CANUSB_BUS_LOAD_BURST)
+        self.next_time = start + bits * 100.0 / (self.bitrate * self.max_load)
+
+        self.sent.append((start, bits))
+        self.sent_bits += bits
+        self.expire(start)
+
+    def expire(self, now):
+        sent = self.sent
+        while sent and now - sent[0][0] > CANUSB_BUS_LOAD_WINDOW:
+            self.sent_bits -= sent.popleft()[1]
+
+    def utilization(self):
+        self.expire(time.monotonic())
+        return 100.0 * self.sent_bits / (self.bitrate * CANUSB_BUS_LOAD_WINDOW)
@@ -0,0 +1,153 @@
+import sys
+import time
+import heapq
+import bisect
+import threading
+
+from canusb.protocol import CANUSB_FRAME
+
+# Upper bounds (exclusive) of the ID ranges reported as separate priority classes.
+CANUSB_TX_PRIORITY_CLASSES_DEFAULT = (0x100, 0x400, 0x800)
+
+
+class PriorityTxQueue:
+    """Transmit queue that drains pending frames in CAN arbitration order.
+
+    send() may be called from any number of threads. A single transmit thread
+    sends pending frames in the order arbitration on a real bus would pick
+    them: lowest 11-bit base ID first (id >> 18 for extended frames), then a
+    standard frame before an extended one with the same base ID, then the full
+    extended ID, then call order. IDs in coalesce_ids keep only their newest
+    payload while waiting, so a backlog never sends stale values for them.
+    send() returns -1 for IDs the adapter cannot send (above 7ff for standard
+    and ffff for extended frames), for payloads over 8 bytes, and once stop()
+    was called or a frame failed to send.
+
+    The order only matters while frames wait, which they only do when the
+    transmit thread is paced; start() therefore enables the bus throttle at
+    the default load cap if none is set.
+
+    latency() reports queue-wait statistics per priority class; classes are the
+    base ID ranges bounded by class_bounds.
+    """
+
+    def __init__(self, bus, coalesce_ids=(), class_bounds=CANUSB_TX_PRIORITY_CLASSES_DEFAULT):
+        self.bus = bus
+        self.coalesce_ids = frozenset(coalesce_ids)
+        self.class_bounds = tuple(class_bounds)
+        self.heap = []
+        self.pending = {}
+        self.seq = 0
+        self.cond = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.stopped = False
+        # Per class: frames sent, frames coalesced, total wait, max wait.
+        self.stats = [[0, 0, 0.0, 0.0] for _ in range(len(self.class_bounds) + 1)]
+
+    def send(self, can_id, data, extended=False):
+        now = time.monotonic()
+        data = bytes(data)
+
+        if len(data) > 8:
+            sys.stderr.write("Data length code (DLC) must be between 0 and 8!\n")
+            return -1
+
+        # The adapter's data frame carries two ID bytes.
+        if not 0 <= can_id <= (0xffff if extended else 0x7ff):
+            sys.stderr.write("ID must be within 0 and {} for {} frames!\n".format(
+                'ffff' if extended else '7ff', 'extended' if extended else 'standard'))
+            return -1
+
+        base_id = can_id >> 18 if extended else can_id
+
+        with self.cond:
+            if self.stopped:
+                return -1
+
+            if can_id in self.coalesce_ids:
+                entry = self.pending.get((can_id, extended))
+                if entry is not None:
+                    # Keep the queue position and wait time, replace the payload.
+                    entry[5] = data
+                    self.stats[bisect.bisect_right(self.class_bounds, base_id)][1] += 1
+                    return 0
+
+            # Heap key: base ID, standard before extended, full ID, call order.
+            entry = [base_id, extended, can_id, self.seq, now, data]
+            self.seq += 1
+            heapq.heappush(self.heap, entry)
+            if can_id in self.coalesce_ids:
+                self.pending[(can_id, extended)] = entry
+            self.cond.notify()
+
+        return 0
+
+    def pop(self):
+        with self.cond:
+            while self.running and not self.heap:
+                self.cond.wait()
+            if not self.heap:
+                return None
+
+            entry = heapq.heappop(self.heap)
+            if entry[2] in self.coalesce_ids:
+                del self.pending[(entry[2], entry[1])]
+
+        wait = time.monotonic() - entry[4]
+        stats = self.stats[bisect.bisect_right(self.class_bounds, entry[0])]
+        stats[0] += 1
+        stats[2] += wait
+        stats[3] = max(stats[3], wait)
+        return entry
+
+    def run(self):
+        extended = CANUSB_FRAME['CANUSB_FRAME_EXTENDED']
+        standard = CANUSB_FRAME['CANUSB_FRAME_STANDARD']
+
+        while True:
+            entry = self.pop()
+            if entry is None:
+                break
+            _, is_extended, can_id, _, _, data = entry
+            if self.bus.send_data_frame(can_id, data, len(data), extended if is_extended else standard) == -1:
+                with self.cond:
+                    self.stopped = True
+                    self.running = False
+                break
+
+    def start(self):
+        if self.bus.throttle is None:
+            from canusb.throttle import CANUSB_BUS_LOAD_MAX_DEFAULT
+            self.bus.set_max_load(CANUSB_BUS_LOAD_MAX_DEFAULT)
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self, drain=True):
+        with self.cond:
+            self.stopped = True
+        if self.thread is None:
+            return
+
+        with self.cond:
+            if not drain:
+                self.heap.clear()
+                self.pending.clear()
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join()
+
+    def backlog(self):
+        return len(self.heap)
+
+    def latency(self):
+        report = []
+        low = 0
+        for bound, (sent, coalesced, total, worst) in zip(self.class_bounds + (None,), self.stats):
+            report.append({'ids': (low, bound), 'sent': sent, 'coalesced': coalesced,
+                           'mean_wait': total / sent if sent else 0.0, 'max_wait': worst})
+            low = bound
+
+        return report
@@ -0,0 +1,30 @@
+import pytest
+
+from canusb.bus import Bus
+
+
+class FakeTty:
+    """Stands in for serial.Serial: records writes and replays queued input."""
+
+    def __init__(self, data=b''):
+        self.written = []
+        self.input = bytearray(data)
+
+    def write(self, frame):
+        self.written.append(bytes(frame))
+        return len(frame)
+
+    def read(self, size=1):
+        chunk = bytes(self.input[:size])
+        del self.input[:size]
+        return chunk
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_bus():
+    bus = Bus('/dev/null')
+    bus.tty_fd = FakeTty()
+    return bus
@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from canusb.analyze import plan_chunks, analyze_chunk, merge_results  # noqa: E402
+from canusb.protocol import CANUSB_FRAME, data_frame, format_frame, pack_record  # noqa: E402
+
+
+def capture_frames(count=3000):
+    rng = random.Random(1)
+    ts = 1700000000.0
+    frames = []
+    for _ in range(count):
+        ts += rng.random() * 0.002
+        if rng.random() < 0.01:
+            frames.append((ts, -1))
+            continue
+        can_id = rng.choice((0x010, 0x123, 0x7ff, 0x1234))
+        dlc = rng.randint(0, 8)
+        payload = bytes(rng.choice((0, 1)) for _ in range(dlc))
+        frame = data_frame(CANUSB_FRAME['CANUSB_FRAME_STANDARD'], can_id & 0xff, can_id >> 8, payload, dlc)
+        frames.append((ts, frame))
+    return frames
+
+
+def run(paths, chunk_size):
+    chunks = plan_chunks([str(path) for path in paths], chunk_size)
+    return merge_results(chunks, [analyze_chunk(chunk) for chunk in chunks])
+
+
+@pytest.fixture(params=['log', 'bin'])
+def capture(request, tmp_path):
+    frames = capture_frames()
+    path = tmp_path / ('capture.' + request.param)
+    if request.param == 'bin':
+        path.write_bytes(b''.join(r for r in (pack_record(ts, f) for ts, f in frames) if r is not None))
+    else:
+        path.write_text(''.join(format_frame(ts, f) for ts, f in frames))
+    return path
+
+
+@pytest.mark.parametrize('chunk_size', [64, 1000, 7777])
+def test_chunks_match_single_pass(capture, chunk_size):
+    stats, duration = run([capture], 1 << 30)
+    chunked, chunked_duration = run([capture], chunk_size)
+
+    assert chunked_duration == duration
+    assert sorted(chunked) == sorted(stats) == [0x010, 0x123, 0x7ff, 0x1234]
+    for can_id, s in stats.items():
+        c = chunked[can_id]
+        for key in ('count', 'changes', 'periods', 'last_data'):
+            assert c[key] == s[key], (hex(can_id), key)
+        for key in ('bits', 'period_sum', 'period_sumsq', 'max_period', 'last_ts'):
+            assert c[key] == pytest.approx(s[key]), (hex(can_id), key)
+
+
+def test_text_matches_binary(tmp_path):
+    frames = capture_frames()
+    text, binary = tmp_path / 'capture.log', tmp_path / 'capture.bin'
+    text.write_text(''.join(format_frame(ts, f) for ts, f in frames))
+    binary.write_bytes(b''.join(r for r in (pack_record(ts, f) for ts, f in frames) if r is not None))
+
+    text_stats, _ = run([text], 1 << 30)
+    binary_stats, _ = run([binary], 1 << 30)
+    for can_id, s in binary_stats.items():
+        # DLC-0 frames are printed as "Unknown:" lines and must still be counted.
+        assert text_stats[can_id]['count'] == s['count']
+        assert text_stats[can_id]['changes'] == s['changes']
+        assert text_stats[can_id]['bits'] == s['bits']
+
+
+def test_files_are_not_stitched(tmp_path):
+    frames = capture_frames()
+    first, second = tmp_path / 'a.log', tmp_path / 'b.log'
+    first.write_text(''.join(format_frame(ts, f) for ts, f in frames))
+    # A second capture an hour later.
+    second.write_text(''.join(format_frame(ts + 3600, f) for ts, f in frames))
+
+    single, single_duration = run([first], 1 << 30)
+    stats, duration = run([second, first], 1000)
+    assert duration == pytest.approx(2 * single_duration)
+    for can_id, s in single.items():
+        assert stats[can_id]['count'] == 2 * s['count']
+        assert stats[can_id]['periods'] == 2 * s['periods']
+        assert stats[can_id]['max_period'] == pytest.approx(s['max_period'])
+        assert stats[can_id]['period_sum'] == pytest.approx(2 * s['period_sum'])
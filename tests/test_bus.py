@@ -0,0 +1,58 @@
+from canusb.protocol import CANUSB_FRAME, CANUSB_PAYLOAD_MODE, data_frame
+
+
+def test_inject_writes_data_frames(fake_bus):
+    assert fake_bus.inject_data_frames(0x123, b'\x01\x02', sleep_gap=0, count=2) == 0
+    assert fake_bus.tty_fd.written == [bytes([0xaa, 0xc2, 0x23, 0x01, 0x01, 0x02, 0x55])] * 2
+
+
+def test_inject_incremental(fake_bus):
+    mode = CANUSB_PAYLOAD_MODE['CANUSB_INJECT_PAYLOAD_MODE_INCREMENTAL']
+    assert fake_bus.inject_data_frames(0x10, b'\xff', payload_mode=mode, sleep_gap=0, count=2) == 0
+    assert [frame[4] for frame in fake_bus.tty_fd.written] == [0x00, 0x01]
+
+
+def test_send_rejects_bad_dlc(fake_bus):
+    assert fake_bus.send_data_frame(0x10, bytes(9), 9) == -1
+    assert fake_bus.tty_fd.written == []
+
+
+def test_fuzz_sweeps_ids_then_dlc(fake_bus):
+    assert fake_bus.fuzz_data_frames(0x7fe, 0x7ff, 1, 2, count=4, seed=1) == 0
+    frames = fake_bus.tty_fd.written
+    assert [(frame[3] << 8) | frame[2] for frame in frames] == [0x7fe, 0x7ff, 0x7fe, 0x7ff]
+    assert [frame[1] & 0xf for frame in frames] == [1, 1, 2, 2]
+
+
+def test_fuzz_frame_type_per_id(fake_bus):
+    assert fake_bus.fuzz_data_frames(0x7fe, 0x801, 1, 1, count=4, seed=1) == 0
+    assert [bool(frame[1] & 0x20) for frame in fake_bus.tty_fd.written] == [False, False, True, True]
+
+
+def test_fuzz_seed_is_reproducible(fake_bus):
+    assert fake_bus.fuzz_data_frames(0x100, 0x10f, 0, 8, count=100, seed=7) == 0
+    first = fake_bus.tty_fd.written
+    fake_bus.tty_fd.written = []
+    assert fake_bus.fuzz_data_frames(0x100, 0x10f, 0, 8, count=100, seed=7) == 0
+    assert fake_bus.tty_fd.written == first
+
+
+def test_fuzz_rejects_bad_range(fake_bus):
+    assert fake_bus.fuzz_data_frames(0x10, 0x1ffff, 0, 8, count=1) == -1
+    assert fake_bus.fuzz_data_frames(0x20, 0x10, 0, 8, count=1) == -1
+    assert fake_bus.tty_fd.written == []
+
+
+def test_dump_reads_frames(fake_bus, capsys):
+    frame = data_frame(CANUSB_FRAME['CANUSB_FRAME_STANDARD'], 0x23, 0x01, b'\xab', 1)
+    fake_bus.tty_fd.input += frame + frame
+    assert fake_bus.dump_data_frames(count=2) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2 and all(line.endswith("Frame ID: 0123, Data: ab ") for line in lines)
+
+
+def test_dump_reads_extended_frames(fake_bus, capsys):
+    frame = data_frame(CANUSB_FRAME['CANUSB_FRAME_EXTENDED'], 0x23, 0x81, b'\x01\x02\x03', 3)
+    fake_bus.tty_fd.input += frame + frame
+    assert fake_bus.dump_data_frames(count=2) == 0
+    assert capsys.readouterr().out.splitlines()[1].endswith("Frame ID: 8123, Data: 03 02 01 ")
@@ -0,0 +1,133 @@
+import gzip
+import json
+
+import pytest
+
+from canusb.capture import ChangeFilter, FlightRecorder, SegmentWriter, trigger_on_errors, trigger_on_id
+from canusb.protocol import CANUSB_FRAME, data_frame
+
+
+def frame(can_id, payload):
+    standard = CANUSB_FRAME['CANUSB_FRAME_STANDARD']
+    return data_frame(standard, can_id & 0xff, can_id >> 8, payload, len(payload))
+
+
+def test_change_filter_passes_changes_only():
+    changes = ChangeFilter()
+    assert changes.accept(frame(0x100, b'\x01\x02'))
+    assert not changes.accept(frame(0x100, b'\x01\x02'))
+    assert changes.accept(frame(0x100, b'\x01\x03'))
+    assert changes.accept(frame(0x200, b'\x01\x03'))
+    assert changes.accept(frame(0x100, b'\x01\x03\x00'))
+    assert changes.accept(-1)
+
+
+def test_change_filter_masks():
+    changes = ChangeFilter({0x100: b'\xf0'})
+    assert changes.accept(frame(0x100, b'\x10\x02'))
+    # Only the high nibble of the first byte is compared, the second byte in full.
+    assert not changes.accept(frame(0x100, b'\x1f\x02'))
+    assert changes.accept(frame(0x100, b'\x20\x02'))
+    assert changes.accept(frame(0x100, b'\x20\x03'))
+    # Other IDs are not masked.
+    assert changes.accept(frame(0x101, b'\x10'))
+    assert changes.accept(frame(0x101, b'\x11'))
+
+
+def test_change_filter_summary():
+    changes = ChangeFilter(summary_interval=1.0)
+    for _ in range(3):
+        changes.accept(frame(0x123, b'\x01'))
+    assert changes.summary(0.0) is None
+    assert changes.summary(1.0) == "1.000000 Suppressed: 0123: 2\n"
+    assert changes.summary(2.0) is None
+
+
+def test_trigger_on_errors_rearms():
+    trigger = trigger_on_errors(2)
+    assert [trigger(0, f) for f in (-1, b'', -1, -1, -1)] == [False, False, True, False, True]
+
+
+def test_flight_recorder_keeps_history_before_long_post_window(tmp_path):
+    recorder = FlightRecorder(trigger_on_id(0x7ff), max_frames=10, post_frames=20,
+                              path_prefix=str(tmp_path / 'fr'))
+    paths = [recorder.record(float(i), frame(0x7ff if i == 15 else 0x100, bytes([i]))) for i in range(40)]
+    saved = [path for path in paths if path is not None]
+    assert recorder.close() is None
+    assert len(saved) == 1
+
+    lines = open(saved[0]).read().splitlines()
+    # Nine frames of history, the trigger frame and at most max_frames after it.
+    assert len(lines) == 20
+    assert lines[9] == "15.000000 Frame ID: 07ff, Data: 0f "
+    assert lines[0].startswith("6.000000 ")
+
+
+def test_flight_recorder_holdoff(tmp_path):
+    recorder = FlightRecorder(trigger_on_id(0x100), max_frames=4, path_prefix=str(tmp_path / 'fr'),
+                              holdoff=1.0)
+    saved = []
+    for i in range(9):
+        saved.append(recorder.record(i * 0.25, frame(0x100, b'\x01')) is not None)
+        recorder.windows.join()
+    recorder.close()
+    assert saved == [True, False, False, False, True, False, False, False, True]
+    assert len(list(tmp_path.iterdir())) == 3
+
+
+def test_flight_recorder_writer_failure(tmp_path, capsys):
+    recorder = FlightRecorder(trigger_on_id(0x100), max_frames=4,
+                              path_prefix=str(tmp_path / 'missing' / 'fr'))
+    assert recorder.record(0.0, frame(0x100, b'\x01')) is not None
+    recorder.windows.join()
+    assert recorder.record(1.0, frame(0x100, b'\x01')) == -1
+    assert recorder.close() == -1
+    assert "Flight recorder writer failed" in capsys.readouterr().err
+
+
+def read_manifest(prefix):
+    with open(str(prefix) + '.manifest') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_segment_writer_rotates_by_size(tmp_path):
+    prefix = tmp_path / 'cap'
+    line = len("0.000000 Frame ID: 0100, Data: 01 \n")
+    writer = SegmentWriter(str(prefix), max_bytes=3 * line, compression='gzip')
+    for i in range(10):
+        assert writer.write(float(i), frame(0x100, b'\x01')) == 0
+    assert writer.close() == 0
+
+    manifest = read_manifest(prefix)
+    assert [segment['frames'] for segment in manifest] == [3, 3, 3, 1]
+    ranges = [(segment['first'], segment['last']) for segment in manifest]
+    assert ranges == [(0.0, 2.0), (3.0, 5.0), (6.0, 8.0), (9.0, 9.0)]
+    assert manifest[0]['path'] == str(prefix) + '-00000.log.gz'
+    with gzip.open(manifest[1]['path'], 'rt') as f:
+        assert f.read().splitlines()[0] == "3.000000 Frame ID: 0100, Data: 01 "
+    assert not list(tmp_path.glob('*.log'))
+
+
+def test_segment_writer_rotates_by_age(tmp_path):
+    prefix = tmp_path / 'cap'
+    writer = SegmentWriter(str(prefix), max_seconds=1.0, compression=None, binary=True)
+    for i in range(10):
+        writer.write(i * 0.5, frame(0x100, b'\x01'))
+    assert writer.close() == 0
+
+    manifest = read_manifest(prefix)
+    assert [segment['frames'] for segment in manifest] == [2] * 5
+    assert manifest[4]['path'] == str(prefix) + '-00004.bin'
+
+
+def test_segment_writer_rejects_unknown_compression(tmp_path):
+    with pytest.raises(ValueError):
+        SegmentWriter(str(tmp_path / 'cap'), compression='bz2')
+
+
+def test_segment_writer_reports_write_errors(tmp_path, capsys):
+    writer = SegmentWriter(str(tmp_path / 'missing' / 'cap'))
+    assert writer.write(0.0, frame(0x100, b'\x01')) == 0
+    assert writer.close() == -1
+    assert writer.write(1.0, frame(0x100, b'\x01')) == -1
+    assert "Capture writer failed" in capsys.readouterr().err
@@ -0,0 +1,13 @@
+from canusb.payload import PayloadPool
+
+
+def test_seeded_pools_repeat():
+    a, b = PayloadPool(size=64, seed=3), PayloadPool(size=64, seed=3)
+    # Crosses a refill: 10 * 8 bytes from a 64 byte pool.
+    assert [bytes(a.take(8)) for _ in range(10)] == [bytes(b.take(8)) for _ in range(10)]
+    assert bytes(PayloadPool(size=64, seed=4).take(8)) != bytes(PayloadPool(size=64, seed=3).take(8))
+
+
+def test_take_lengths():
+    pool = PayloadPool(size=16)
+    assert [len(pool.take(n)) for n in (0, 8, 8, 5)] == [0, 8, 8, 5]
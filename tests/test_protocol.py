@@ -0,0 +1,43 @@
+from canusb.protocol import CANUSB_FRAME, CANUSB_RECORD, CANUSB_RECORD_FLAG_EXTENDED, data_frame, \
+    convert_from_hex, frame_is_complete, format_frame, pack_record
+
+
+def test_data_frame_standard_header():
+    frame = data_frame(CANUSB_FRAME['CANUSB_FRAME_STANDARD'], 0x23, 0x01, b'\x01\x02\x03', 3)
+    assert frame == bytearray([0xaa, 0xc3, 0x23, 0x01, 0x01, 0x02, 0x03, 0x55])
+
+
+def test_data_frame_extended_header():
+    frame = data_frame(CANUSB_FRAME['CANUSB_FRAME_EXTENDED'], 0x23, 0x01, bytes(8), 8)
+    assert frame[1] == 0xc0 | 0x20 | 8
+    assert len(frame) == 13
+
+
+def test_frame_is_complete_extended():
+    frame = data_frame(CANUSB_FRAME['CANUSB_FRAME_EXTENDED'], 0x23, 0x01, bytes(range(8)), 8)
+    assert not any(frame_is_complete(frame[:n]) for n in range(1, len(frame)))
+    assert frame_is_complete(frame)
+
+
+def test_convert_from_hex_eight_bytes(capsys):
+    data = bytearray(8)
+    assert convert_from_hex("0102030405060708", data) == 8
+    assert data == bytes(range(1, 9))
+    assert capsys.readouterr().out == ""
+
+
+def test_convert_from_hex_truncates(capsys):
+    data = bytearray(8)
+    assert convert_from_hex("010203040506070809", data) == 8
+    assert "truncated to 8 bytes" in capsys.readouterr().out
+
+
+def test_format_frame():
+    frame = data_frame(CANUSB_FRAME['CANUSB_FRAME_STANDARD'], 0x23, 0x01, b'\x01\x02', 2)
+    assert format_frame(1.5, frame) == "1.500000 Frame ID: 0123, Data: 02 01 \n"
+
+
+def test_pack_record_extended_flag():
+    frame = data_frame(CANUSB_FRAME['CANUSB_FRAME_EXTENDED'], 0x23, 0x81, b'\x01', 1)
+    ts, can_id, flags, dlc, data = CANUSB_RECORD.unpack(pack_record(2.0, frame))
+    assert (ts, can_id, flags, dlc, data[:dlc]) == (2.0, 0x8123, CANUSB_RECORD_FLAG_EXTENDED, 1, b'\x01')
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from canusb.protocol import CANUSB_FRAME, data_frame
+
+shm = pytest.importorskip('canusb.shm')
+
+
+@pytest.fixture
+def ring_name():
+    return 'canusb-test-{}'.format(os.getpid())
+
+
+def frame(i):
+    return data_frame(CANUSB_FRAME['CANUSB_FRAME_STANDARD'], i & 0xff, 0x01, bytes([i & 0xff]), 1)
+
+
+def test_subscriber_reads_in_order(ring_name):
+    publisher = shm.ShmPublisher(ring_name, slots=8)
+    subscriber = shm.ShmSubscriber(ring_name)
+    try:
+        for i in range(5):
+            publisher.write(float(i), frame(i))
+        frames = subscriber.read()
+        assert [f[1] for f in frames] == [0x100 + i for i in range(5)]
+        assert frames[0] == (0.0, 0x100, False, b'\x00')
+        assert subscriber.overruns == 0
+    finally:
+        subscriber.close()
+        publisher.close()
+
+
+def test_subscriber_counts_overruns(ring_name):
+    publisher = shm.ShmPublisher(ring_name, slots=8)
+    subscriber = shm.ShmSubscriber(ring_name)
+    try:
+        for i in range(20):
+            publisher.write(float(i), frame(i))
+        frames = subscriber.read()
+        assert len(frames) == 8
+        assert subscriber.overruns == 12
+        assert [f[0] for f in frames] == [float(i) for i in range(12, 20)]
+    finally:
+        subscriber.close()
+        publisher.close()
+
+
+def test_publisher_replaces_stale_ring(ring_name):
+    stale = shm.ShmPublisher(ring_name, slots=4)
+    # Pretend the publisher died: point the header at a pid that cannot exist.
+    shm.SHM_HEADER.pack_into(stale.buf, 0, shm.SHM_MAGIC, 4, shm.SHM_SLOT.size, 0, 0x7fffffff)
+    stale.buf = None
+    stale.shm.close()
+
+    publisher = shm.ShmPublisher(ring_name, slots=4)
+    publisher.close()
+
+
+def test_publisher_refuses_live_ring(ring_name):
+    publisher = shm.ShmPublisher(ring_name, slots=4)
+    try:
+        with pytest.raises(FileExistsError):
+            shm.ShmPublisher(ring_name, slots=4)
+    finally:
+        publisher.close()
@@ -0,0 +1,64 @@
+import pytest
+
+from canusb import throttle
+from canusb.protocol import can_frame_bits
+from canusb.throttle import BusThrottle, CANUSB_BUS_LOAD_WINDOW, CANUSB_BUS_LOAD_BURST
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(throttle, 'time', clock)
+    return clock
+
+
+def test_can_frame_bits_worst_case():
+    assert can_frame_bits(0) == 55
+    assert can_frame_bits(8) == 135
+    assert can_frame_bits(8, True) == 160
+
+
+def test_throttle_paces_to_max_load(clock):
+    bus_throttle = BusThrottle(500000, 50)
+    start = clock.now
+    for _ in range(1000):
+        bus_throttle.wait(8)
+    # 1000 frames of 135 bits at half of 500 kbit/s; an idle throttle starts
+    # with one burst of credit and the first frame goes out at once.
+    assert clock.now - start == pytest.approx(999 * 135 / 250000.0 - CANUSB_BUS_LOAD_BURST)
+
+
+def test_throttle_utilization_window(clock):
+    bus_throttle = BusThrottle(500000, 80)
+    while clock.now < 1002.0:
+        bus_throttle.wait(8)
+    assert bus_throttle.utilization() == pytest.approx(80.0, rel=1e-3)
+
+    clock.now += CANUSB_BUS_LOAD_WINDOW / 2
+    assert bus_throttle.utilization() == pytest.approx(40.0, rel=1e-2)
+    clock.now += CANUSB_BUS_LOAD_WINDOW
+    assert bus_throttle.utilization() == 0.0
+
+
+def test_throttle_rejects_bad_load():
+    for max_load in (-10, 0, 101):
+        with pytest.raises(ValueError):
+            BusThrottle(500000, max_load)
+
+
+def test_bus_utilization(fake_bus, clock):
+    assert fake_bus.utilization() is None
+    fake_bus.set_max_load(80)
+    assert fake_bus.inject_data_frames(0x10, bytes(8), sleep_gap=0, count=10) == 0
+    assert fake_bus.utilization() == pytest.approx(100.0 * 10 * 135 / 500000)
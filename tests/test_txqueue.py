@@ -0,0 +1,44 @@
+from canusb.txqueue import PriorityTxQueue
+
+
+def sent_frames(bus):
+    # (ID, extended, payload) as put on the wire by Bus.send_data_frame().
+    return [((frame[3] << 8) | frame[2], bool(frame[1] & 0x20), frame[4:-1]) for frame in bus.tty_fd.written]
+
+
+def test_drains_in_arbitration_order(fake_bus):
+    tx = PriorityTxQueue(fake_bus)
+    tx.send(0x300, b'\x01')
+    tx.send(0x0105, b'\x02', extended=True)
+    tx.send(0x100, b'\x03')
+    tx.send(0x050, b'\x04')
+    tx.start()
+    tx.stop()
+    # Extended IDs up to ffff have base ID 0 and win against any standard ID but 0.
+    assert sent_frames(fake_bus) == [(0x0105, True, b'\x02'), (0x050, False, b'\x04'),
+                                     (0x100, False, b'\x03'), (0x300, False, b'\x01')]
+    assert fake_bus.throttle is not None
+
+
+def test_coalesces_pending_payloads(fake_bus):
+    tx = PriorityTxQueue(fake_bus, coalesce_ids=[0x200])
+    for i in range(3):
+        tx.send(0x200, bytes([i]))
+    tx.start()
+    tx.stop()
+    assert sent_frames(fake_bus) == [(0x200, False, b'\x02')]
+    assert tx.latency()[1]['coalesced'] == 2
+
+
+def test_rejects_what_the_adapter_cannot_send(fake_bus):
+    tx = PriorityTxQueue(fake_bus)
+    assert tx.send(0x10, bytes(9)) == -1
+    assert tx.send(0x800, b'\x01') == -1
+    assert tx.send(0x04000005, b'\x01', extended=True) == -1
+    assert tx.backlog() == 0
+
+
+def test_send_after_stop(fake_bus):
+    tx = PriorityTxQueue(fake_bus)
+    tx.stop()
+    assert tx.send(0x10, b'\x01') == -1